@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
 import os
 import glob
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 
+try:
+    import polars as pl
+except ImportError:  # fall back to pandas' PyArrow reader
+    pl = None
+
 # ─── CONFIG ────────────────────────────────────────────────────────────────
 input_dir  = 'station_csvs'   # folder containing your per‐station CSVs
 output_dir = 'spearman_corr'  # folder to save correlation matrices
@@ -18,22 +25,85 @@ variables = [
     'TSS_mg_L','SECCHI_DEPTH_M','NOx_TKN_Sum'
 ]
 
-# Process each station file
-for csv_path in glob.glob(os.path.join(input_dir, '*.csv')):
+# pandas' default NA tokens, so Polars nulls the same cells pandas does
+NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+             '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None',
+             'n/a', 'nan', 'null']
+
+def read_station(csv_path):
+    """Return the numeric listed variables in one station file and their float64 matrix."""
+    if pl is not None:
+        lf = pl.scan_csv(csv_path, infer_schema=False, null_values=NA_VALUES)
+        existing = [v for v in variables if v in lf.collect_schema().names()]
+        raw = lf.select(existing).collect(engine='streaming')
+        num = raw.select(pl.all().str.strip_chars().cast(pl.Float64, strict=False))
+        # a column is numeric if casting turned no value into null
+        cols = [c for c in existing if num[c].null_count() == raw[c].null_count()]
+        return cols, num.select(cols).to_numpy()
+
+    header = pd.read_csv(csv_path, nrows=0).columns
+    existing = [v for v in variables if v in header]
+    df = pd.read_csv(csv_path, engine='pyarrow', usecols=existing)
+    cols = list(df[existing].select_dtypes('number').columns)
+    return cols, df[cols].to_numpy(dtype=np.float64)
+
+def spearman_corr(arr, cols):
+    """Spearman correlation on pairwise complete rows, as DataFrame.corr(method='spearman')."""
+    arr = np.ascontiguousarray(np.asarray(arr, dtype=np.float64).T)
+    valid = ~np.isnan(arr)
+    k, n = arr.shape
+
+    # ranks[i, j, r]: rank of column i at row r among rows valid in i and j
+    ranks = np.zeros((k, k, n))
+    for i in range(k):
+        order = np.flatnonzero(valid[i])
+        order = order[np.argsort(arr[i, order], kind='mergesort')]
+        xs = arr[i, order]
+        m = valid[:, order]
+        cs = np.zeros((k, len(order) + 1))
+        np.cumsum(m, axis=1, out=cs[:, 1:])
+
+        # average rank within each run of tied values
+        new_run = np.r_[True, xs[1:] != xs[:-1]]
+        starts = np.flatnonzero(new_run)
+        ends = np.r_[starts[1:], len(xs)]
+        run = np.cumsum(new_run) - 1
+        below = cs[:, starts[run]]
+        tied = cs[:, ends[run]] - below
+        ranks[i][:, order] = (below + (tied + 1) / 2) * m
+
+    # average ranks over c values always sum to c(c+1)/2
+    count = valid.astype(np.float64) @ valid.T
+    centre = count * ((count + 1) / 2) ** 2
+    sxx = np.einsum('ijr,ijr->ij', ranks, ranks) - centre
+    sxy = np.array([np.einsum('jr,jr->j', ranks[i], ranks[:, i])
+                    for i in range(k)]) - centre
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = sxy / np.sqrt(sxx * sxx.T)
+
+    return pd.DataFrame(corr, index=cols, columns=cols)
+
+def process_station(csv_path):
     print(csv_path)
     station_id = os.path.splitext(os.path.basename(csv_path))[0]
-    df = pd.read_csv(csv_path)
 
-    # Determine which variables exist
-    existing = [v for v in variables if v in df.columns]
+    # Read only the variables that exist in this file
+    existing, arr = read_station(csv_path)
     missing  = set(variables) - set(existing)
     if missing:
         print(f"[{station_id}] Skipping missing vars: {sorted(missing)}")
 
     # Compute Spearman correlation on pairwise complete observations
-    corr = df[existing].corr(method='spearman', numeric_only=True)
+    corr = spearman_corr(arr, existing)
 
     # Save to CSV
     out_path = os.path.join(output_dir, f"{station_id}_spearman.csv")
     corr.to_csv(out_path)
     print(f"[{station_id}] Spearman correlation saved to {out_path}")
+
+# ─── MAIN ──────────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    # One station file per worker; each worker reads its own CSV
+    csv_files = glob.glob(os.path.join(input_dir, '*.csv'))
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+        list(ex.map(process_station, csv_files))
@@ -31,7 +31,8 @@ for cat in ['0-1 m', '>1 m']:
     series = series.reindex(full_idx).interpolate(method='time')
     
     # b) Theil–Sen slope (pH change per year)
-    x = series.index.map(pd.Timestamp.toordinal).values
+    # x in days since epoch
+    x = series.index.values.astype('datetime64[D]').astype(np.int64)
     y = series.values
     slope, intercept, lower, upper = theilslopes(y, x, 0.95)
     slope_year = slope * 365
@@ -63,7 +64,8 @@ for cat, res in results.items():
 plt.figure(figsize=(10, 6))
 for cat, res in results.items():
     series = res['series']
-    trend = res['intercept'] + res['slope'] * series.index.map(pd.Timestamp.toordinal).values
+    x = series.index.values.astype('datetime64[D]').astype(np.int64)
+    trend = res['intercept'] + res['slope'] * x
     plt.plot(series.index, series, label=f'{cat} monthly pH')
     plt.plot(series.index, trend, linewidth=2, label=f'{cat} Sen’s trend')
 plt.title('Monthly Mean pH and Theil–Sen Trend by Depth Category')
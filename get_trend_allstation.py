@@ -2,48 +2,76 @@
 import os
 import glob
 import argparse
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from scipy.stats import theilslopes, kendalltau
 
 def main(input_dir, variable_col, plot_folder):
+    # deferred imports
+    import pandas as pd
+    import numpy as np
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from trend_stats import interp_monthly, mk_tau_sorted_x, theil_sen
+
     os.makedirs(plot_folder, exist_ok=True)
     summary_csv = f"{variable_col}_summary.csv"
     summary = []
 
+    # Read every station once into a single frame
+    stations = []
+    frames = []
     for csv_path in glob.glob(os.path.join(input_dir, '*.csv')):
         station_id = os.path.splitext(os.path.basename(csv_path))[0]
-        df = pd.read_csv(csv_path)
-
-        # Parse dates (e.g. "6/30/94 11:00")
-        df['Date'] = (pd.to_datetime(
-                          df['FDT_DATE_TIME'],
-                          format='%m/%d/%y %H:%M',
-                          errors='coerce')
-                      .dt.normalize())
-        df = df.dropna(subset=['Date', 'FDT_DEPTH', variable_col])
-        if df.empty:
+        stations.append(station_id)
+        frames.append(pd.read_csv(csv_path,
+                                  engine='pyarrow',
+                                  usecols=['FDT_DATE_TIME', 'FDT_DEPTH', variable_col],
+                                  dtype_backend='pyarrow')
+                      .assign(station_id=station_id))
+    if frames:
+        df = pd.concat(frames, ignore_index=True)
+    else:
+        df = pd.DataFrame(columns=['FDT_DATE_TIME', 'FDT_DEPTH', variable_col, 'station_id'])
+
+    # Parse dates (e.g. "6/30/94 11:00")
+    df['Date'] = (pd.to_datetime(
+                      df['FDT_DATE_TIME'],
+                      format='%m/%d/%y %H:%M',
+                      errors='coerce')
+                  .dt.normalize())
+    df = df.dropna(subset=['Date', 'FDT_DEPTH', variable_col])
+
+    # Depth bands
+    df['Depth_band'] = np.where(df['FDT_DEPTH'] <= 1, '0-1 m', '>1 m')
+
+    # Monthly means per station & band, keyed on calendar month, then dated at month-end
+    df['YM'] = df['Date'].values.astype('datetime64[M]')
+    monthly = (df
+               .groupby(['station_id', 'Depth_band', 'YM'])[variable_col]
+               .mean()
+               .reset_index())
+    ym = monthly.pop('YM').values.astype('datetime64[M]')
+    monthly['Date'] = ((ym + 1).astype('datetime64[D]') - 1).astype(df['Date'].values.dtype)
+
+    # build & interpolate a continuous series per (station, band)
+    series = {}
+    for key, sub in monthly.groupby(['station_id', 'Depth_band']):
+        series[key] = (sub, *interp_monthly(sub['Date'], sub[variable_col]))
+
+    # one figure, reused for every station
+    fig, ax = plt.subplots(figsize=(10,5))
+
+    for station_id in stations:
+        bands = [band for band in ['0-1 m', '>1 m'] if (station_id, band) in series]
+        if not bands:
             print(f"[{station_id}] no valid {variable_col} data, skipping.")
             continue
 
-        # Depth bands
-        df['Depth_band'] = np.where(df['FDT_DEPTH'] <= 1, '0-1 m', '>1 m')
-
-        # Monthly means (month-end)
-        monthly = (df
-                   .groupby(['Depth_band', pd.Grouper(key='Date', freq='ME')])[variable_col]
-                   .mean()
-                   .reset_index())
-
         # Plot setup
-        plt.figure(figsize=(10,5))
-        ax = plt.gca()
+        ax.clear()
+        labels = []
 
-        for band in ['0-1 m', '>1 m']:
-            sub = monthly[monthly['Depth_band'] == band]
-            if sub.empty:
-                continue
+        for band in bands:
+            sub, dates, y = series[station_id, band]
 
             # months of raw data
             months = len(sub)
@@ -51,19 +79,13 @@ def main(input_dir, variable_col, plot_folder):
             start_year = sub['Date'].min().year
             end_year   = sub['Date'].max().year
 
-            # build & interpolate continuous series
-            s = sub.set_index('Date')[variable_col]
-            idx = pd.date_range(s.index.min(), s.index.max(), freq='ME')
-            s = s.reindex(idx).interpolate(method='time')
-
             # Theil–Sen
-            x = s.index.map(pd.Timestamp.toordinal).values
-            y = s.values
-            slope, intercept, low, high = theilslopes(y, x, 0.95)
+            x = dates.astype(np.int64)
+            slope, intercept, low, high = theil_sen(y, x, 0.95)
             slope_yr = slope * 365
 
             # Mann–Kendall
-            tau, pval = kendalltau(np.arange(len(y)), y)
+            tau, pval = mk_tau_sorted_x(y)
             signif = 'sig' if pval < 0.05 else 'ns'
 
             # record summary
@@ -78,17 +100,22 @@ def main(input_dir, variable_col, plot_folder):
             })
 
             # plot series + trend
-            ax.plot(s.index, s, label=f"{band} monthly mean")
-            ax.plot(s.index,
+            ax.plot(dates, y, label=f"{band} monthly mean")
+            ax.plot(dates,
                     intercept + slope * x,
                     '--',
                     label=f"{band} trend")
 
-            # annotate slope & signif
-            x0 = s.index[0]
-            y0 = ax.get_ylim()[1] - 0.05*(ax.get_ylim()[1] - ax.get_ylim()[0])
-            ax.text(x0, y0 - 0.05*(ax.get_ylim()[1] - ax.get_ylim()[0]) * ['0-1 m','>1 m'].index(band),
-                    f"{band}: {slope_yr:.3f} ({signif})",
+            labels.append((band, dates[0], f"{band}: {slope_yr:.3f} ({signif})"))
+
+        # annotate slope & signif, against the axis limits of the finished plot
+        ax.relim()
+        ax.autoscale_view()
+        ymin, ymax = ax.get_ylim()
+        y0 = ymax - 0.05*(ymax - ymin)
+        for band, x0, label in labels:
+            ax.text(x0, y0 - 0.05*(ymax - ymin) * ['0-1 m','>1 m'].index(band),
+                    label,
                     va='top')
 
         # finalize plot
@@ -96,13 +123,13 @@ def main(input_dir, variable_col, plot_folder):
         ax.set_xlabel("Date")
         ax.set_ylabel(variable_col)
         ax.legend()
-        plt.tight_layout()
+        fig.tight_layout()
 
-        # save & show
+        # save
         out_png = os.path.join(plot_folder, f"{station_id}_trend.png")
-        plt.savefig(out_png, dpi=200)
-        plt.show()
-        plt.close()
+        fig.savefig(out_png, dpi=200)
+
+    plt.close(fig)
 
     # write summary CSV
     pd.DataFrame(summary).to_csv(summary_csv, index=False)
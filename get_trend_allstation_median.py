@@ -1,10 +1,6 @@
 #!/usr/bin/env python3
 import os
 import glob
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from scipy.stats import theilslopes, kendalltau
 
 # ─── CONFIG ────────────────────────────────────────────────────────────────
 input_dir    = 'station_csvs'    # folder containing your per‐station CSVs
@@ -12,9 +8,19 @@ output_plots = 'station_plots'   # where to save PNG trend plots
 os.makedirs(output_plots, exist_ok=True)
 # ────────────────────────────────────────────────────────────────────────────
 
-def analyze_station(csv_path):
+def analyze_station(csv_path, fig, ax):
+    # deferred imports
+    import pandas as pd
+    import numpy as np
+    from trend_stats import interp_monthly, mk_tau_sorted_x, theil_sen
+
     station_id = os.path.splitext(os.path.basename(csv_path))[0]
-    df = pd.read_csv(csv_path)
+    df = pd.read_csv(
+        csv_path,
+        engine='pyarrow',
+        usecols=['FDT_DATE_TIME', 'FDT_DEPTH', 'FDT_FIELD_PH'],
+        dtype_backend='pyarrow'
+    )
 
     # 1) Parse date strings like "6/30/94 11:00"
     df['Date'] = (
@@ -25,7 +31,9 @@ def analyze_station(csv_path):
         )
         .dt.normalize()
     )
-    df = df.dropna(subset=['Date', 'FDT_DEPTH', 'FDT_FIELD_PH']).copy()
+    # keep only the columns used below, on complete rows
+    cols = ['Date', 'FDT_DEPTH', 'FDT_FIELD_PH']
+    df = df.loc[df[cols].notna().all(axis=1), cols]
     if df.empty:
         print(f"Station {station_id}: no valid records, skipping.")
         return
@@ -34,18 +42,22 @@ def analyze_station(csv_path):
     df['Depth_cat'] = np.where(df['FDT_DEPTH'] <= 1, '0-1 m', '>1 m')
     raw_counts = df['Depth_cat'].value_counts().to_dict()
 
-    # 3) Calendar‐month medians (month‐end)
+    # 3) Calendar‐month medians, keyed on calendar month, dated at month‐end
+    df['YM'] = df['Date'].values.astype('datetime64[M]')
     monthly = (
         df
-        .groupby([
-            'Depth_cat',
-            pd.Grouper(key='Date', freq='ME')
-        ])['FDT_FIELD_PH']
+        .groupby(['Depth_cat', 'YM'])['FDT_FIELD_PH']
         .median()
         .reset_index()
     )
+    ym = monthly.pop('YM').values.astype('datetime64[M]')
+    monthly['Date'] = (
+        ((ym + 1).astype('datetime64[D]') - 1)
+        .astype(df['Date'].values.dtype)
+    )
 
-    results = {}
+    # build continuous monthly series & interpolate gaps
+    series = {}
     month_counts = {}
     for cat in ['0-1 m', '>1 m']:
         sub = monthly[monthly['Depth_cat'] == cat]
@@ -53,29 +65,25 @@ def analyze_station(csv_path):
             continue
 
         month_counts[cat] = len(sub)
+        series[cat] = interp_monthly(sub['Date'], sub['FDT_FIELD_PH'])
 
-        # build continuous monthly series & interpolate gaps
-        s = sub.set_index('Date')['FDT_FIELD_PH']
-        full_idx = pd.date_range(s.index.min(), s.index.max(), freq='ME')
-        s = s.reindex(full_idx).interpolate(method='time')
-
+    results = {}
+    for cat, (dates, y) in series.items():
         # Theil–Sen slope
-        x = s.index.map(pd.Timestamp.toordinal).values
-        y = s.values
-        slope, intercept, low, high = theilslopes(y, x, 0.95)
+        slope, intercept, low, high = theil_sen(y, dates.astype(np.int64), 0.95)
         slope_yr = slope * 365
         ci_lower = low * 365
         ci_upper = high * 365
 
         # Mann–Kendall test
-        tau, p_val = kendalltau(np.arange(len(y)), y)
+        tau, p_val = mk_tau_sorted_x(y)
 
         results[cat] = {
             'slope_yr': slope_yr,
             'ci': (ci_lower, ci_upper),
             'tau': tau,
             'p_val': p_val,
-            'series': s,
+            'series': (dates, y),
             'intercept': intercept,
             'slope': slope
         }
@@ -96,28 +104,35 @@ def analyze_station(csv_path):
             f"τ = {r['tau']:.3f}, p = {r['p_val']:.4g}"
         )
 
-    # 5) Plot, show, and save
-    plt.figure(figsize=(10, 4))
+    # 5) Plot and save
+    ax.clear()
     for cat, r in results.items():
-        s = r['series']
-        trend = r['intercept'] + r['slope'] * s.index.map(pd.Timestamp.toordinal)
-        plt.plot(s.index, s, label=f"{cat} monthly median pH")
-        plt.plot(s.index, trend, '--', label=f"{cat} Sen’s trend")
-    plt.title(f"pH Trend — Station {station_id} (Median)")
-    plt.xlabel("Date")
-    plt.ylabel("pH")
-    plt.legend()
-    plt.tight_layout()
-
-    # display interactively
-    plt.show()
+        dates, y = r['series']
+        trend = r['intercept'] + r['slope'] * dates.astype(np.int64)
+        ax.plot(dates, y, label=f"{cat} monthly median pH")
+        ax.plot(dates, trend, '--', label=f"{cat} Sen’s trend")
+    ax.set_title(f"pH Trend — Station {station_id} (Median)")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("pH")
+    ax.legend()
+    fig.tight_layout()
 
     # save to disk
     out_png = os.path.join(output_plots, f"{station_id}_median_trend.png")
-    plt.savefig(out_png, dpi=200)
-    plt.close()
+    fig.savefig(out_png, dpi=200)
 
 # ─── MAIN LOOP ─────────────────────────────────────────────────────────────
-if __name__ == "__main__":
+def main():
+    # deferred imports
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    # one figure, reused for every station
+    fig, ax = plt.subplots(figsize=(10, 4))
     for csv_file in glob.glob(os.path.join(input_dir, '*.csv')):
-        analyze_station(csv_file)
+        analyze_station(csv_file, fig, ax)
+    plt.close(fig)
+
+if __name__ == "__main__":
+    main()
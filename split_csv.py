@@ -1,4 +1,6 @@
 #!/usr/bin/env python3
+import csv
+import io
 import pandas as pd
 import os
 import sys
@@ -7,24 +9,47 @@ import sys
 input_file = 'SMLDEQdata_v5.csv'
 output_dir = 'station_csvs'
 
-# 2. Load the data (Excel first, then CSV)
-try:
-    df = pd.read_excel(input_file, engine='openpyxl')
-except Exception:
-    df = pd.read_csv(input_file)
+# 2. Open the data as a stream of rows (Excel is converted in memory)
+ext = os.path.splitext(input_file)[1].lower()
+if ext in ('.xlsx', '.xlsm'):
+    src = io.StringIO(pd.read_excel(input_file, engine='openpyxl').to_csv(index=False))
+else:
+    src = open(input_file, newline='', encoding='utf-8')
+reader = csv.reader(src)
+header = next(reader)
+sta_col = header.index('FDT_STA_ID')
 
 # 3. Make sure output folder exists
 os.makedirs(output_dir, exist_ok=True)
 
-# 4. Split, write, and collect counts
-summary = []
-for sta_id, group in df.groupby('FDT_STA_ID'):
-    # sanitize station ID for a filename
-    safe_id = str(sta_id).strip().replace('/', '_').replace(' ', '_')
+# 4. Single pass: append each row to its station's file, collecting counts
+files, writers, counts = {}, {}, {}
+try:
+    for row in reader:
+        # skip blank or truncated lines
+        if len(row) <= sta_col:
+            continue
+        sta_id = row[sta_col].strip()
+        if not sta_id:
+            continue
+        # sanitize station ID for a filename
+        safe_id = sta_id.replace('/', '_').replace(' ', '_')
+        if safe_id not in writers:
+            out_path = os.path.join(output_dir, f"{safe_id}.csv")
+            files[safe_id] = open(out_path, 'w', newline='', encoding='utf-8')
+            writers[safe_id] = csv.writer(files[safe_id])
+            writers[safe_id].writerow(header)
+            counts[safe_id] = 0
+        writers[safe_id].writerow(row)
+        counts[safe_id] += 1
+finally:
+    src.close()
+    for f in files.values():
+        f.close()
+
+summary = sorted(counts.items())
+for safe_id, count in summary:
     out_path = os.path.join(output_dir, f"{safe_id}.csv")
-    group.to_csv(out_path, index=False)
-    count = len(group)
-    summary.append((safe_id, count))
     print(f"• Wrote {count} rows to {out_path}")
 
 # 5. Print a neat summary